@@ -1,12 +1,14 @@
 from __future__ import annotations
 
 import contextlib
+import hashlib
 import importlib
 import os
 import pathlib
 import re
 import shutil
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from io import StringIO
 from typing import Optional
 
@@ -14,6 +16,11 @@ from duty import duty
 
 PACKAGE_NAME = "easy_email_downloader"
 REPO_URL = "https://github.com/dtomlinson91/easy-email-downloader"
+CACHE_DIR = pathlib.Path(".") / ".duty_cache"
+
+_VERSION_RE = re.compile(r"(?<=to\s)([^\$]*)")
+_BUILT_RE = re.compile(r"(?:.*)(?:Built\s)(.*)")
+_MARKER_RE = re.compile(r"<!-- marker -->")
 
 
 @duty(post=["export"])
@@ -82,16 +89,17 @@ def bump(ctx, version: str = "patch"):
     """
     # bump with poetry
     result = ctx.run(["poetry", "version", version])
-    new_version = re.search(r"(?<=to\s)([^\$]*)", result)
-    print(new_version.group(0))
+    new_version = _VERSION_RE.search(result)
+    new_version_string = new_version.group(0).strip()
+    print(new_version_string)
 
     # update _version.py
     version_file = pathlib.Path(PACKAGE_NAME) / "_version.py"
     with version_file.open("w", encoding="utf-8") as version_file:
         version_file.write(
-            f'"""Module containing the version of {PACKAGE_NAME}."""\n\n' + f'__version__ = "{new_version.group(0)}"\n'
+            f'"""Module containing the version of {PACKAGE_NAME}."""\n\n' + f'__version__ = "{new_version_string}"\n'
         )
-    print(f"Bumped _version.py to {new_version.group(1)}")
+    print(f"Bumped _version.py to {new_version_string}")
 
 
 @duty
@@ -113,7 +121,7 @@ def build(ctx):
     print(result)
 
     # extract the setup.py from the tar
-    extracted_tar = re.search(r"(?:.*)(?:Built\s)(.*)", result)
+    extracted_tar = _BUILT_RE.search(result)
     tar_file = pathlib.Path(f"./dist/{extracted_tar.group(1)}")
     shutil.unpack_archive(tar_file, tar_file.parents[0])
 
@@ -168,16 +176,7 @@ def export(ctx):
     #         "--without-hashes",
     #     ]
     # )
-    requirements_dev_content = ctx.run(
-        [
-            "poetry",
-            "export",
-            "-f",
-            "requirements.txt",
-            "--without-hashes",
-            "--dev",
-        ]
-    )
+    requirements_dev_content = _cached_poetry_export(ctx)
 
     requirements = pathlib.Path(".") / "requirements.txt"
     # requirements_dev = pathlib.Path(".") / "requirements_dev.txt"
@@ -202,8 +201,7 @@ def publish(ctx, password: str):
         `duty publish password=$my_password`
     """
     dist_dir = pathlib.Path(".") / "dist"
-    rm_result = rm_tree(dist_dir)
-    print(rm_result)
+    shutil.rmtree(dist_dir, ignore_errors=True)
 
     publish_result = ctx.run(["poetry", "publish", "-u", "dtomlinson", "-p", password, "--build"])
     print(publish_result)
@@ -217,19 +215,32 @@ def clean(ctx):
     Args:
         ctx: The context instance (passed automatically).
     """
-    ctx.run("rm -rf .mypy_cache")
-    ctx.run("rm -rf .pytest_cache")
-    ctx.run("rm -rf tests/.pytest_cache")
-    ctx.run("rm -rf build")
-    ctx.run("rm -rf dist")
-    ctx.run("rm -rf pip-wheel-metadata")
-    ctx.run("rm -rf site")
-    ctx.run("rm -rf coverage.xml")
-    ctx.run("rm -rf pytest.xml")
-    ctx.run("rm -rf htmlcov")
-    ctx.run("find . -iname '.coverage*' -not -name .coveragerc | xargs rm -rf")
-    ctx.run("find . -type d -name __pycache__ | xargs rm -rf")
-    ctx.run("find . -name '*.rej' -delete")
+    repo_root = pathlib.Path(".")
+    for directory in [
+        ".duty_cache",
+        ".mypy_cache",
+        ".pytest_cache",
+        "tests/.pytest_cache",
+        "build",
+        "dist",
+        "pip-wheel-metadata",
+        "site",
+        "htmlcov",
+    ]:
+        shutil.rmtree(repo_root / directory, ignore_errors=True)
+    for file in ["coverage.xml", "pytest.xml"]:
+        (repo_root / file).unlink(missing_ok=True)
+
+    # collect the matches first so the tree isn't modified while it is being walked
+    for path in [path for path in repo_root.rglob(".coverage*") if path.name != ".coveragerc"]:
+        if path.is_dir():
+            shutil.rmtree(path, ignore_errors=True)
+        else:
+            path.unlink(missing_ok=True)
+    for path in list(repo_root.rglob("__pycache__")):
+        shutil.rmtree(path, ignore_errors=True)
+    for path in list(repo_root.rglob("*.rej")):
+        path.unlink(missing_ok=True)
 
 
 @duty
@@ -247,14 +258,27 @@ def format(ctx):
     print(res)
 
 
-@duty(pre=["check_code_quality", "check_types", "check_docs", "check_dependencies"])
+@duty
 def check(ctx):
     """
     Check the code quality, check types, check documentation builds and check dependencies for vulnerabilities.
 
+    The code quality, type and documentation checks each wait on their own subprocess so they are ran in parallel
+    threads. The dependency check runs `safety` in this process, which swaps `sys.stdout` and `sys.stderr` to capture
+    its output, so it is ran once the other checks have finished. All checks run to completion before the first
+    failure is raised.
+
     Args:
         ctx: The context instance (passed automatically).
     """
+    checks = [check_code_quality, check_types, check_docs]
+    with ThreadPoolExecutor(max_workers=len(checks)) as executor:
+        futures = [executor.submit(_check, ctx) for _check in checks]
+    try:
+        check_dependencies(ctx)
+    finally:
+        for future in futures:
+            future.result()
 
 
 @duty
@@ -308,7 +332,7 @@ def check_dependencies(ctx):
         ctx: The context instance (passed automatically).
     """
     with contextlib.suppress(ModuleNotFoundError):
-        for module in sys.modules:
+        for module in list(sys.modules):
             if module.startswith("safety.") or module == "safety":
                 del sys.modules[module]
 
@@ -318,8 +342,8 @@ def check_dependencies(ctx):
         from safety.formatter import report
         from safety.util import read_requirements
 
-        requirements = ctx.run(
-            "poetry export --dev --without-hashes",
+        requirements = _cached_poetry_export(
+            ctx,
             title="Exporting dependencies as requirements",
             allow_overrides=False,
         )
@@ -364,24 +388,38 @@ def changelog(ctx, planned_release: Optional[str] = None, previous_release: Opti
     with changelog_file.open("r", encoding="utf-8") as changelog_contents:
         all_lines = changelog_contents.readlines()
         for line_string in all_lines:
-            regex_string = re.search(r"(<!-- marker -->)", line_string)
             new_changelog.append(line_string)
-            if isinstance(regex_string, re.Match):
+            if _MARKER_RE.search(line_string):
                 new_changelog.append(generated_changelog)
     with changelog_file.open("w", encoding="utf-8") as changelog_contents:
         changelog_contents.writelines(new_changelog)
 
 
-def rm_tree(directory: pathlib.Path):
+def _cached_poetry_export(ctx, **kwargs) -> str:
     """
-    Recursively delete a directory and all its contents.
+    Export the dev dependencies as requirements, caching the output on disk.
+
+    Poetry resolves the whole dependency graph on every export. The output only changes when `poetry.lock` or
+    `pyproject.toml` change so it is cached keyed on their modification times and sizes.
 
     Args:
-        directory (pathlib.Path): The directory to delete.
+        ctx: The context instance.
+        **kwargs: Passed to `ctx.run`.
+
+    Returns:
+        str: The exported requirements.
     """
-    for child in directory.glob("*"):
-        if child.is_file():
-            child.unlink()
-        else:
-            rm_tree(child)
-    directory.rmdir()
+    export_command = ["poetry", "export", "-f", "requirements.txt", "--without-hashes", "--dev"]
+    cache_key = ":".join(
+        f"{path.stat().st_mtime_ns}:{path.stat().st_size}"
+        for path in (pathlib.Path(".") / "poetry.lock", pathlib.Path(".") / "pyproject.toml")
+    )
+    cache_key = hashlib.sha256(f"{cache_key}:{' '.join(export_command)}".encode("utf-8")).hexdigest()
+    cache_file = CACHE_DIR / f"export-{cache_key}.txt"
+    if cache_file.exists():
+        return cache_file.read_text(encoding="utf-8")
+
+    requirements = ctx.run(export_command, **kwargs)
+    CACHE_DIR.mkdir(exist_ok=True)
+    cache_file.write_text(requirements, encoding="utf-8")
+    return requirements
@@ -6,4 +6,11 @@ An easy way to download emails from an IMAP server in Python.
 Author: Daniel Tomlinson <dtomlinson@panaetius.co.uk>
 """
 
-from easy_email_downloader.utils import EmailConfig, EmailFilter, download_emails
+from easy_email_downloader.common import close_pool
+from easy_email_downloader.utils import (
+    EmailConfig,
+    EmailFilter,
+    download_emails,
+    download_emails_async,
+    download_emails_iter,
+)
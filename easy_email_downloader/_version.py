@@ -1,4 +1,3 @@
 """Module containing the version of easy_email_downloader."""
 
-__version__ = "2.0.0
-"
+__version__ = "2.0.0"
@@ -1,5 +1,21 @@
 """Module containing common functions for easy-email-downloader."""
+import contextlib
 import imaplib
+import threading
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# the maximum number of idle connections kept per account
+MAX_IDLE_CONNECTIONS = 8
+
+# the number of seconds between NOOPs sent to idle connections - servers commonly drop connections idle for 30 minutes
+KEEPALIVE_INTERVAL = 25 * 60
+
+_ConnectionKey = Tuple[str, int, str, str]
+
+# idle authenticated connections keyed by (host, port, email_address, password)
+_CONNECTIONS: Dict[_ConnectionKey, List[imaplib.IMAP4_SSL]] = {}
+_CONNECTIONS_LOCK = threading.Lock()
+_KEEPALIVE_TIMER: Optional[threading.Timer] = None
 
 
 def get_imap_instance(host: str, email_address: str, password: str, port: int = 993) -> imaplib.IMAP4_SSL:
@@ -16,5 +32,142 @@ def get_imap_instance(host: str, email_address: str, password: str, port: int =
         imaplib.IMAP4_SSL: The connected imap instance.
     """
     imap = imaplib.IMAP4_SSL(host=host, port=port)
-    imap.login(user=email_address, password=password)
+    try:
+        imap.login(user=email_address, password=password)
+    except imaplib.IMAP4.error:
+        # close the socket of a refused login
+        imap.shutdown()
+        raise
     return imap
+
+
+@contextlib.contextmanager
+def get_connection(host: str, email_address: str, password: str, port: int = 993) -> Iterator[imaplib.IMAP4_SSL]:
+    """
+    Get a connected imap instance from the connection cache.
+
+    An idle connection for the same account is reused if it still responds to a `NOOP`, otherwise a new connection
+    is opened. The connection is returned to the cache on exit so the TLS handshake and login are only paid once.
+    A connection that was dropped by the server is discarded instead.
+
+    Args:
+        host (str): The host URL of the imap server. E.g `mail.example.com`
+        email_address (str): The email address to login as.
+        password (str): The password.
+        port (int, optional): The imap port to use. Defaults to 993.
+
+    Yields:
+        imaplib.IMAP4_SSL: The connected imap instance.
+    """
+    key = (host, port, email_address, password)
+    imap = _checkout_connection(key)
+    if imap is None:
+        imap = get_imap_instance(host=host, email_address=email_address, password=password, port=port)
+
+    reusable = True
+    try:
+        yield imap
+    except (imaplib.IMAP4.abort, OSError):
+        reusable = False
+        raise
+    finally:
+        if reusable:
+            _release_connection(key, imap)
+        else:
+            _logout(imap)
+
+
+def _checkout_connection(key: _ConnectionKey) -> Optional[imaplib.IMAP4_SSL]:
+    """
+    Take a live idle connection out of the cache.
+
+    Args:
+        key (_ConnectionKey): The account the connection is for.
+
+    Returns:
+        Optional[imaplib.IMAP4_SSL]: The connection, or None if there are no live idle connections.
+    """
+    while True:
+        with _CONNECTIONS_LOCK:
+            idle_connections = _CONNECTIONS.get(key)
+            if not idle_connections:
+                return None
+            imap = idle_connections.pop()
+        try:
+            imap.noop()
+        except (imaplib.IMAP4.error, OSError):
+            _logout(imap)
+            continue
+        return imap
+
+
+def _release_connection(key: _ConnectionKey, imap: imaplib.IMAP4_SSL) -> None:
+    """
+    Return a connection to the cache, logging out if the cache for the account is full.
+
+    Args:
+        key (_ConnectionKey): The account the connection is for.
+        imap (imaplib.IMAP4_SSL): The connection.
+    """
+    with _CONNECTIONS_LOCK:
+        idle_connections = _CONNECTIONS.setdefault(key, [])
+        if len(idle_connections) < MAX_IDLE_CONNECTIONS:
+            idle_connections.append(imap)
+            _schedule_keepalive()
+            return
+    _logout(imap)
+
+
+def close_pool() -> None:
+    """Logout of all idle connections in the connection cache and stop the keepalive."""
+    global _KEEPALIVE_TIMER  # pylint: disable=global-statement
+    with _CONNECTIONS_LOCK:
+        if _KEEPALIVE_TIMER is not None:
+            _KEEPALIVE_TIMER.cancel()
+            _KEEPALIVE_TIMER = None
+        idle_connections = [imap for connections in _CONNECTIONS.values() for imap in connections]
+        _CONNECTIONS.clear()
+    for imap in idle_connections:
+        _logout(imap)
+
+
+def _schedule_keepalive() -> None:
+    """
+    Start the keepalive timer if it isn't already running.
+
+    Must be called with `_CONNECTIONS_LOCK` held.
+    """
+    global _KEEPALIVE_TIMER  # pylint: disable=global-statement
+    if _KEEPALIVE_TIMER is None:
+        _KEEPALIVE_TIMER = threading.Timer(KEEPALIVE_INTERVAL, _keepalive)
+        _KEEPALIVE_TIMER.daemon = True
+        _KEEPALIVE_TIMER.start()
+
+
+def _keepalive() -> None:
+    """Send a `NOOP` to every idle connection, discarding any that were dropped by the server."""
+    global _KEEPALIVE_TIMER  # pylint: disable=global-statement
+    with _CONNECTIONS_LOCK:
+        _KEEPALIVE_TIMER = None
+        idle_connections = {key: connections[:] for key, connections in _CONNECTIONS.items()}
+        _CONNECTIONS.clear()
+
+    for key, connections in idle_connections.items():
+        for imap in connections:
+            try:
+                imap.noop()
+            except (imaplib.IMAP4.error, OSError):
+                _logout(imap)
+                continue
+            _release_connection(key, imap)
+
+
+def _logout(imap: imaplib.IMAP4_SSL) -> None:
+    """
+    Logout of a connection, ignoring any errors from an already closed connection.
+
+    Args:
+        imap (imaplib.IMAP4_SSL): The connection.
+    """
+    with contextlib.suppress(imaplib.IMAP4.error, OSError):
+        imap.logout()
@@ -2,10 +2,15 @@
 
 from __future__ import annotations
 
-from dataclasses import dataclass, field
-from typing import List, Optional
+import datetime
+import imaplib
+import pathlib
+import time
+from dataclasses import InitVar, dataclass, field
+from email.message import Message
+from typing import ContextManager, List, Optional, Tuple
 
-from easy_email_downloader.common import get_imap_instance
+from easy_email_downloader.common import get_connection
 
 
 @dataclass
@@ -15,7 +20,8 @@ class Email:
 
     This dataclass represents a downloaded email from an IMAP server.
 
-    Attachments are stored as a list of `bytes` and can be saved to disk using `open(filename, "wb")` as needed.
+    Attachments are stored as a list of `Attachment` objects. Their `contents` can be saved to disk using
+    `open(filename, "wb")` as needed.
 
     Attributes:
         sender (str): The sender in the form `first_name last_name <email_address>`.
@@ -25,14 +31,17 @@ class Email:
         attachments (List[Optional[Attachment]]): A list of attachments as
             [Attachment][easy_email_downloader.models.Attachment] objects. If no attachments this is an empty list.
         content_type (str): The content type. Either `text/plain` or `text/html`.
+        headers_only (bool): Whether only the headers were downloaded because the email was larger than
+            `EmailFilter.max_body_bytes`. If True the `body` and `attachments` are empty.
     """
 
-    sender: str = field(default_factory=lambda: "")
-    subject: str = field(default_factory=lambda: "")
-    date: str = field(default_factory=lambda: "")
-    body: str = field(default_factory=lambda: "")
-    attachments: List[Optional[Attachment]] = field(default_factory=lambda: [])
-    content_type: str = field(default_factory=lambda: "")
+    sender: str = ""
+    subject: str = ""
+    date: str = ""
+    body: str = ""
+    attachments: List[Optional[Attachment]] = field(default_factory=list)
+    content_type: str = ""
+    headers_only: bool = False
 
 
 @dataclass
@@ -48,29 +57,51 @@ class EmailConfig:
         password (str): The password.
         mailbox (str): The mailbox to download emails from.
         port (int): The IMAP port of the server.
+        max_connections (int): The maximum number of connections used to download emails in parallel. Servers that
+            limit the number of connections per user may need this lowering. The extra connections are opened on a
+            best effort basis, if the server refuses them the download continues with the connections that opened.
     """
 
     host: str
     email_address: str
     password: str
-    mailbox: str = field(default_factory=lambda: "")
+    mailbox: str = ""
     port: int = 993
+    max_connections: int = 8
+    _mailboxes_cache: Tuple[float, List[str]] | None = field(default=None, init=False, repr=False, compare=False)
 
-    def list_mailboxes(self) -> List[str]:
+    def get_connection(self) -> ContextManager[imaplib.IMAP4_SSL]:
+        """
+        Get a connected imap instance for this config from the connection cache.
+
+        Returns:
+            ContextManager[imaplib.IMAP4_SSL]: A context manager yielding the connected imap instance.
+        """
+        return get_connection(host=self.host, email_address=self.email_address, password=self.password, port=self.port)
+
+    def list_mailboxes(self, ttl: float = 60) -> List[str]:
         """
         List all mailboxes.
 
+        Mailboxes rarely change so the result is cached on the instance for `ttl` seconds.
+
         Args:
-            host (str): The IMAP server host.
-            email_address (str): The email address.
-            password (str): The email password.
+            ttl (float, optional): The number of seconds to reuse the previous result for. If 0 the IMAP server is
+                always queried. Defaults to 60.
 
         Returns:
             List[str]: A list of mailboxes from the IMAP server.
         """
-        imap = get_imap_instance(self.host, self.email_address, self.password)
-        mailboxes = imap.list()
-        return [mailbox.decode(encoding="utf-8") for mailbox in mailboxes[-1] if isinstance(mailbox, bytes)]
+        if self._mailboxes_cache is not None and time.monotonic() - self._mailboxes_cache[0] < ttl:
+            return self._mailboxes_cache[1][:]
+
+        with self.get_connection() as imap:
+            mailboxes = imap.list()
+        decoded_mailboxes = [
+            mailbox.decode(encoding="utf-8") for mailbox in mailboxes[-1] if isinstance(mailbox, bytes)
+        ]
+        self._mailboxes_cache = (time.monotonic(), decoded_mailboxes)
+        return decoded_mailboxes[:]
 
 
 @dataclass
@@ -78,8 +109,8 @@ class EmailFilter:
     """
     A dataclass used to store user options to filter emails on the IMAP server before downloading.
 
-    `subject` and `sender` are optional and any combination of the two can be used. If both are left out then all
-    emails are downloaded.
+    `subject`, `sender`, `since` and `before` are optional and any combination of them can be used. If all are left
+    out then all emails are downloaded.
 
     Filtering emails by `subject` is implemented differently on each IMAP server. Exact strings often won't match.
 
@@ -88,16 +119,57 @@ class EmailFilter:
     Attributes:
         subject (str | None, optional): The subject to filter by. Defaults to None.
         sender (str | None, optional): The sender email address to filter by. Defaults to None.
+        since (datetime.date | None, optional): Only download emails received on or after this date. Defaults to None.
+        before (datetime.date | None, optional): Only download emails received before this date. Defaults to None.
         messages_to_download (int, optional): The number of emails to download. If -1 will download all. Defaults to -1.
         oldest_first (bool, optional): Whether to download emails starting with the oldest first. Defaults to False.
         delete_after_download (bool, optional): Whether to delete the emails after successfully downloading. Defaults to False.
+        max_body_bytes (int, optional): The maximum size of an email to download in full. Larger emails only have
+            their headers downloaded and are never deleted by `delete_after_download`. If -1 will download all emails
+            in full. Defaults to -1.
+        attachment_spool_threshold (int, optional): The encoded size in bytes above which an attachment is decoded
+            to a temporary file instead of being kept in memory. If -1 attachments are never spooled to disk.
+            Defaults to -1.
+        prefer_content_type (str, optional): The content type the `body` is taken from when an email has both a
+            `text/plain` and a `text/html` part. The other part is only decoded if there isn't one of this type.
+            Defaults to "text/plain".
     """
 
     subject: str | None = None
     sender: str | None = None
+    since: datetime.date | None = None
+    before: datetime.date | None = None
     messages_to_download: int = -1
     oldest_first: bool = False
     delete_after_download: bool = False
+    max_body_bytes: int = -1
+    attachment_spool_threshold: int = -1
+    prefer_content_type: str = "text/plain"
+
+
+class _AttachmentContents:
+    """
+    The descriptor for `Attachment.contents` that decodes the contents from the email part when first accessed.
+
+    The decoded contents are kept and the email part is released, so the payload is only ever decoded once.
+    """
+
+    def __get__(self, attachment: Attachment | None, owner: type | None = None) -> bytes | None:
+        # the default of the dataclass field
+        if attachment is None:
+            return None
+
+        contents = attachment.__dict__.get("_contents")
+        if contents is None and attachment.path is not None:
+            return pathlib.Path(attachment.path).read_bytes()
+        part = attachment.__dict__.pop("_part", None)
+        if contents is None and part is not None:
+            contents = attachment.__dict__["_contents"] = part.get_payload(decode=True)
+        return contents
+
+    def __set__(self, attachment: Attachment, contents: bytes | None) -> None:
+        attachment.__dict__["_contents"] = contents
+        attachment.__dict__.pop("_part", None)
 
 
 @dataclass
@@ -105,10 +177,30 @@ class Attachment:
     """
     A dataclass used to represent an attatchment in an email.
 
+    The contents are decoded from the email part the first time `Attachment.contents` is accessed, so attachments
+    that are never read are never decoded. The part is then released and the decoded contents kept.
+
+    Attachments larger than `EmailFilter.attachment_spool_threshold` are decoded to a temporary file at `path`
+    instead and read from disk each time they are accessed. The file is not removed automatically - delete it once
+    the contents have been saved.
+
     Attributes:
         filename (str | None, optional): The filename of the attachment. Defaults to None.
         contents (bytes | None, optional): The contents of the attachment in bytes. Defaults to None.
+        part (Message | None, optional): The email part to decode the contents from if `contents` isn't given. Not
+            stored as a field. Defaults to None.
+        path (str | None, optional): The path of the temporary file if the attachment was spooled to disk. Defaults
+            to None.
+        size (int | None, optional): The decoded size of the attachment in bytes if it was spooled to disk. Defaults
+            to None.
     """
 
     filename: str | None = None
-    contents: bytes | None = None
+    contents: _AttachmentContents = _AttachmentContents()
+    part: InitVar[Message | None] = None
+    path: str | None = field(default=None, compare=False)
+    size: int | None = field(default=None, compare=False)
+
+    def __post_init__(self, part: Message | None) -> None:
+        if part is not None and self.__dict__.get("_contents") is None:
+            self.__dict__["_part"] = part
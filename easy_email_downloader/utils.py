@@ -1,29 +1,69 @@
 """Module containing utils functions for easy-email-downloader."""
 from __future__ import annotations
 
+import asyncio
+import binascii
+import collections
 import contextlib
-import email
+import datetime
+import functools
 import imaplib
+import io
+import os
 import re
+import tempfile
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
 from email.header import decode_header
 from email.message import Message
-from typing import Any, List, Tuple
+from email.parser import BytesHeaderParser, BytesParser
+from email.policy import compat32
+from typing import IO, Any, Deque, Dict, Iterator, List, Tuple
 
-from easy_email_downloader.common import get_imap_instance
 from easy_email_downloader.exceptions import NoMessagesFoundError, NonExistentMailboxError
 from easy_email_downloader.models import Attachment, Email, EmailConfig, EmailFilter
 
+# the maximum number of messages fetched with a single FETCH
+FETCH_BATCH_SIZE = 50
+
+# the maximum number of messages flagged with a single STORE - keeps the command well under server line length limits
+STORE_BATCH_SIZE = 1000
+
+# matches the UID in a UID FETCH response envelope
+_FETCH_UID_RE = re.compile(rb"\bUID (\d+)")
+
+# matches the size of a message in a FETCH response envelope
+_FETCH_SIZE_RE = re.compile(rb"RFC822\.SIZE (\d+)")
+
+# the FETCH data items for a full message and for the headers and size only - PEEK leaves the \Seen flag unchanged
+_FETCH_MESSAGE = "(BODY.PEEK[])"
+_FETCH_HEADERS = "(RFC822.SIZE BODY.PEEK[HEADER.FIELDS (SUBJECT FROM DATE)])"
+
+# parsers hold no state between messages so they are shared by all worker threads
+_HEADER_PARSER = BytesHeaderParser(policy=compat32)
+_MESSAGE_PARSER = BytesParser(policy=compat32)
+
+_IMAP_MONTHS = ("Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec")
+
+# search filters keyed by whether the subject (2) and sender (1) are set
+_SEARCH_FILTERS = {
+    1: 'FROM "{sender}"',
+    2: 'SUBJECT "{subject}"',
+    3: 'SUBJECT "{subject}" FROM "{sender}"',
+}
+
 
 def download_emails(
     email_config: EmailConfig,
-    email_filter: EmailFilter = EmailFilter(),
+    email_filter: EmailFilter | None = None,
 ) -> List[Email]:
     """
     Download emails from an IMAP server.
 
     Args:
         email_config (EmailConfig): An instance of `EmailConfig` containing user credentials for an IMAP server.
-        email_filter (EmailFilter, optional): An instance of `EmailFilter` with any user filters. Defaults to EmailFilter().
+        email_filter (EmailFilter | None, optional): An instance of `EmailFilter` with any user filters. If None all
+            emails are downloaded. Defaults to None.
 
     Raises:
         NoMessagesFoundError: Raised if no messages are found in the selected mailbox.
@@ -31,50 +71,150 @@ def download_emails(
     Returns:
         List[Email]: A list of `Email` objects containing the downloaded emails.
     """
-    # get imap instance
-    imap = get_imap_instance(
-        host=email_config.host,
-        email_address=email_config.email_address,
-        password=email_config.password,
-    )
+    return list(download_emails_iter(email_config, email_filter))
+
 
-    # get messages for mailbox
-    _, _messages = imap.select(email_config.mailbox)
+def download_emails_iter(
+    email_config: EmailConfig,
+    email_filter: EmailFilter | None = None,
+) -> Iterator[Email]:
+    """
+    Download emails from an IMAP server, yielding each email as it is downloaded.
 
-    # check mailbox exists
-    check_mailbox(_messages)
+    Only a few batches of emails are held in memory at a time, so large mailboxes can be processed without keeping
+    every email in memory. If `delete_after_download` is set the emails are only deleted once every email has been
+    yielded.
 
-    # create search filter
-    _search_filter = f"({create_search_filter(email_filter)})"
+    Args:
+        email_config (EmailConfig): An instance of `EmailConfig` containing user credentials for an IMAP server.
+        email_filter (EmailFilter | None, optional): An instance of `EmailFilter` with any user filters. If None all
+            emails are downloaded. Defaults to None.
 
-    # search for messages matching filter
-    _, messages = imap.search(None, _search_filter)
+    Raises:
+        NoMessagesFoundError: Raised if no messages are found in the selected mailbox.
 
-    # split messages into a list
-    messages = messages[-1].split(b" ")
+    Yields:
+        Email: The downloaded emails.
+    """
+    # a new filter per call - a default instance would be shared between every call
+    if email_filter is None:
+        email_filter = EmailFilter()
+
+    # connections are returned to the connection cache on exit
+    with contextlib.ExitStack() as connections:
+        # get imap instance
+        imap = connections.enter_context(email_config.get_connection())
+
+        # get messages for mailbox
+        _, _messages = imap.select(email_config.mailbox)
+
+        # check mailbox exists
+        check_mailbox(_messages)
+
+        # create search filter - without any filters only the sequence numbers of the messages to download are searched
+        _search_filter = create_search_filter(email_filter)
+        if _search_filter == "ALL":
+            _search_filter = _message_range(_messages[0], email_filter) or _search_filter
+        _search_filter = f"({_search_filter})"
+
+        # search for the UIDs of messages matching filter - UIDs stay valid if other messages are expunged
+        _, messages = imap.uid("SEARCH", None, _search_filter)
+
+        # if no messages for inbox raise error
+        raw_messages = messages[-1]
+        if not raw_messages:
+            raise NoMessagesFoundError(f"No messages found in mailbox {email_config.mailbox}")
+
+        # split messages into a list - only split off the messages to download
+        # emails by default are oldest first - reverse to get most recent first
+        messages_to_download = email_filter.messages_to_download
+        if messages_to_download > 0 and email_filter.oldest_first:
+            messages = raw_messages.split(b" ", messages_to_download)[:messages_to_download]
+        elif messages_to_download > 0:
+            messages = raw_messages.rsplit(b" ", messages_to_download)[-messages_to_download:][::-1]
+        else:
+            messages = raw_messages.split(b" ")
+            if not email_filter.oldest_first:
+                # reverse in place - every message is kept so a reversed copy would double the list
+                messages.reverse()
+
+        # verify total messages in mailbox is <= total messages to download
+        messages_to_download_verified = len(messages)
+
+        # open a pool of connections to fetch messages in parallel - an imaplib connection is not thread safe
+        imap_pool = [imap] + open_imap_pool(
+            connections, email_config, min(email_config.max_connections, messages_to_download_verified) - 1
+        )
 
-    # emails by default are oldest first - reverse to get most recent first
-    if not email_filter.oldest_first:
-        messages.reverse()
+        # fetch the message
+        yield from iter_messages(email_filter, imap_pool, messages, messages_to_download_verified)
 
-    # if no messages for inbox raise error
-    if len(messages) == 1 and messages[0] == b"":
-        raise NoMessagesFoundError(f"No messages found in mailbox {email_config.mailbox}")
 
-    # verify total messages in mailbox is <= total messages to download
-    messages_to_download_verified = (
-        min(len(messages), email_filter.messages_to_download)
-        if email_filter.messages_to_download > 0
-        else len(messages)
-    )
+async def download_emails_async(
+    email_config: EmailConfig,
+    email_filter: EmailFilter | None = None,
+) -> List[Email]:
+    """
+    Download emails from an IMAP server without blocking the event loop.
 
-    # fetch the message
-    return fetch_messages(email_filter, imap, messages, messages_to_download_verified)
+    The download runs `download_emails` in the default executor, so the parallel fetches overlap with other tasks on
+    the event loop.
+
+    Args:
+        email_config (EmailConfig): An instance of `EmailConfig` containing user credentials for an IMAP server.
+        email_filter (EmailFilter | None, optional): An instance of `EmailFilter` with any user filters. If None all
+            emails are downloaded. Defaults to None.
+
+    Raises:
+        NoMessagesFoundError: Raised if no messages are found in the selected mailbox.
+
+    Returns:
+        List[Email]: A list of `Email` objects containing the downloaded emails.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, functools.partial(download_emails, email_config, email_filter))
+
+
+def open_imap_pool(
+    connections: contextlib.ExitStack, email_config: EmailConfig, pool_size: int
+) -> List[imaplib.IMAP4_SSL]:
+    """
+    Open a pool of connected imap instances with the mailbox selected.
+
+    The connections are taken from the connection cache in parallel so any TLS handshakes and logins are only paid
+    once in wall time. They are returned to the cache when `connections` is closed.
+
+    Opening the connections is best effort - a connection the server refuses, e.g because of a limit on the number
+    of connections per user, is left out of the pool.
+
+    Args:
+        connections (contextlib.ExitStack): The exit stack the connections are registered on.
+        email_config (EmailConfig): An instance of `EmailConfig` containing user credentials for an IMAP server.
+        pool_size (int): The number of connections to open.
+
+    Returns:
+        List[imaplib.IMAP4_SSL]: A list of connected `imaplib.IMAP4_SSL` instances. This can be shorter than
+            `pool_size`.
+    """
+    if pool_size < 1:
+        return []
+
+    def _open_imap(_: int) -> imaplib.IMAP4_SSL | None:
+        try:
+            imap = connections.enter_context(email_config.get_connection())
+            # each connection needs its own SELECT
+            status, _ = imap.select(email_config.mailbox)
+        except (imaplib.IMAP4.error, OSError):
+            return None
+        return imap if status == "OK" else None
+
+    with ThreadPoolExecutor(max_workers=pool_size) as executor:
+        return [imap for imap in executor.map(_open_imap, range(pool_size)) if imap is not None]
 
 
 def fetch_messages(
     email_filter: EmailFilter,
-    imap: imaplib.IMAP4_SSL,
+    imap_pool: List[imaplib.IMAP4_SSL],
     messages: Any,
     messages_to_download_verified: int,
 ) -> List[Email]:
@@ -83,50 +223,262 @@ def fetch_messages(
 
     Args:
         email_filter (EmailFilter): The user email filter.
-        imap (imaplib.IMAP4_SSL): A connected `imaplib.IMAP4_SSL` instance.
-        messages (Any): A list of bytes from an `imaplib.IMAP4_SSL.search` containing integers of messages
-            in the mailbox.
+        imap_pool (List[imaplib.IMAP4_SSL]): A list of connected `imaplib.IMAP4_SSL` instances with the mailbox
+            selected.
+        messages (Any): A list of bytes from an `imaplib.IMAP4_SSL.uid("SEARCH", ...)` containing the UIDs of
+            messages in the mailbox.
         messages_to_download_verified (int): The number of messages to download.
 
     Returns:
         List[Email]: A list of `Email` objects containing the downloaded emails.
     """
-    downloaded_emails: List[Email] = []
-    for _message in messages[:messages_to_download_verified]:
-        # fetch the message
-        _, message = imap.fetch(str(_message.decode("utf-8")), ("RFC822"))
-
-        # create an Email() object from the downloaded message
-        for response in message:
-            if isinstance(response, tuple):
-                email_object = Email()
-                msg = email.message_from_bytes(response[-1])  # noqa pylint(unsubscriptable-object)
-                (
-                    email_object.subject,
-                    email_object.sender,
-                    email_object.date,
-                ) = get_subject_and_sender(msg)
-
-                if msg.is_multipart():
-                    email_object = get_multipart_email(msg=msg, email_object=email_object)
-                else:
-                    email_object = get_non_multipart_email(msg=msg, email_object=email_object)
-
-                downloaded_emails.append(email_object)
-
-        # delete the message on the IMAP server if the flag is set
-        if email_filter.delete_after_download:
-            imap.store(str(_message.decode("utf-8")), "+FLAGS", "\\Deleted")
-            imap.expunge()
+    return list(iter_messages(email_filter, imap_pool, messages, messages_to_download_verified))
+
+
+def iter_messages(
+    email_filter: EmailFilter,
+    imap_pool: List[imaplib.IMAP4_SSL],
+    messages: Any,
+    messages_to_download_verified: int,
+) -> Iterator[Email]:
+    """
+    Fetch messages from an IMAP server, yielding each email as it is downloaded.
+
+    The messages are split into batches of at most `FETCH_BATCH_SIZE` which are spread over the connections in the
+    `imap_pool`. Each batch is fetched with a single `FETCH` of the message set and parsed in a worker thread. Only
+    two batches per connection are downloaded ahead of the caller, so parsing one batch overlaps with fetching the
+    next. The emails are yielded in the same order as `messages`.
+
+    Args:
+        email_filter (EmailFilter): The user email filter.
+        imap_pool (List[imaplib.IMAP4_SSL]): A list of connected `imaplib.IMAP4_SSL` instances with the mailbox
+            selected.
+        messages (Any): A list of bytes from an `imaplib.IMAP4_SSL.uid("SEARCH", ...)` containing the UIDs of
+            messages in the mailbox.
+        messages_to_download_verified (int): The number of messages to download.
+
+    Yields:
+        Email: The downloaded emails.
+    """
+    uids = messages[:messages_to_download_verified]
+    if not uids:
+        return
+    locks = [threading.Lock() for _ in imap_pool]
+
+    # only messages that were yielded in full are deleted
+    downloaded_uids: List[bytes] = []
+
+    # split the messages into contiguous batches - small downloads still use every connection
+    batch_size = min(FETCH_BATCH_SIZE, -(-len(uids) // len(imap_pool)))
+    batches = [uids[offset : offset + batch_size] for offset in range(0, len(uids), batch_size)]
+
+    # keep two batches per connection in flight ahead of the caller, with a worker thread each - a connection's lock
+    # is released before parsing so one batch is parsed while the next is fetched on the same connection
+    window = 2 * len(imap_pool)
+    with ThreadPoolExecutor(max_workers=window) as executor:
+        pending: Deque[Tuple[List[bytes], Future]] = collections.deque()
+        for index, batch in enumerate(batches):
+            connection = index % len(imap_pool)
+            future = executor.submit(_download_messages, imap_pool[connection], locks[connection], batch, email_filter)
+            pending.append((batch, future))
+            if len(pending) == window:
+                yield from _ordered_emails(*pending.popleft(), downloaded_uids)
+        while pending:
+            yield from _ordered_emails(*pending.popleft(), downloaded_uids)
+
+    # delete the messages on the IMAP server if the flag is set - emails with only their headers downloaded are kept
+    if email_filter.delete_after_download and downloaded_uids:
+        for offset in range(0, len(downloaded_uids), STORE_BATCH_SIZE):
+            imap_pool[0].uid(
+                "STORE", _message_set(downloaded_uids[offset : offset + STORE_BATCH_SIZE]), "+FLAGS", "\\Deleted"
+            )
+        imap_pool[0].expunge()
+
+
+def _ordered_emails(uids: List[bytes], batch_emails: Future, downloaded_uids: List[bytes]) -> Iterator[Email]:
+    """
+    Wait for a downloaded batch and yield its emails in the order of `uids`.
 
+    Args:
+        uids (List[bytes]): The messages in the batch.
+        batch_emails (Future): The future from `_download_messages` for the batch.
+        downloaded_uids (List[bytes]): The messages yielded in full. Each message is appended once it is yielded.
+
+    Yields:
+        Email: The downloaded emails. A message the server did not return, e.g because it was removed since the
+            search, is skipped.
+    """
+    downloaded_emails = batch_emails.result()
+    for uid in uids:
+        if uid in downloaded_emails:
+            email_object = downloaded_emails[uid]
+            yield email_object
+            if not email_object.headers_only:
+                downloaded_uids.append(uid)
+
+
+def _download_messages(
+    imap: imaplib.IMAP4_SSL, lock: threading.Lock, uids: List[bytes], email_filter: EmailFilter
+) -> Dict[bytes, Email]:
+    """
+    Fetch and parse a batch of messages.
+
+    If `email_filter.max_body_bytes` is set the headers and size of each message are fetched first, and only the
+    messages within the limit are fetched in full. The rest are returned with `Email.headers_only` set.
+
+    Args:
+        imap (imaplib.IMAP4_SSL): A connected `imaplib.IMAP4_SSL` instance.
+        lock (threading.Lock): The lock guarding `imap`.
+        uids (List[bytes]): The messages to fetch.
+        email_filter (EmailFilter): The user email filter.
+
+    Returns:
+        Dict[bytes, Email]: The downloaded emails keyed by message.
+    """
+    header_messages: Dict[bytes, Tuple[bytes, bytes]] = {}
+    with lock:
+        if email_filter.max_body_bytes < 0:
+            raw_messages = _fetch_batch(imap, uids, _FETCH_MESSAGE)
+        else:
+            header_messages = _fetch_batch(imap, uids, _FETCH_HEADERS)
+            uids_to_download = [
+                uid
+                for uid in uids
+                if uid in header_messages and _message_size(header_messages[uid][0]) <= email_filter.max_body_bytes
+            ]
+            raw_messages = _fetch_batch(imap, uids_to_download, _FETCH_MESSAGE) if uids_to_download else {}
+
+    downloaded_emails = {
+        uid: parse_email(raw_message, email_filter=email_filter) for uid, (_, raw_message) in raw_messages.items()
+    }
+    for uid, (_, raw_headers) in header_messages.items():
+        if uid not in downloaded_emails:
+            downloaded_emails[uid] = parse_email(raw_headers, headers_only=True)
     return downloaded_emails
 
 
+def _fetch_batch(imap: imaplib.IMAP4_SSL, uids: List[bytes], message_parts: str) -> Dict[bytes, Tuple[bytes, bytes]]:
+    """
+    Fetch a batch of messages with a single `UID FETCH`.
+
+    The server returns the messages in mailbox order, each as an `(envelope, message)` tuple followed by the rest of
+    its response, e.g `b")"` or `b" UID 4)"`. The order of the data items isn't fixed, so each message is matched back
+    to its `uid` using the UID in either the envelope or the rest of the response.
+
+    Args:
+        imap (imaplib.IMAP4_SSL): A connected `imaplib.IMAP4_SSL` instance.
+        uids (List[bytes]): The messages to fetch.
+        message_parts (str): The message data items to fetch, e.g `(BODY.PEEK[])`.
+
+    Returns:
+        Dict[bytes, Tuple[bytes, bytes]]: The envelope and raw data keyed by message. Messages the server did not
+            return are left out.
+    """
+    _, data = imap.uid("FETCH", _message_set(uids), message_parts)
+    raw_messages: Dict[bytes, Tuple[bytes, bytes]] = {}
+    fetched_message: Tuple[bytes, bytes] | None = None
+    for response in data:
+        if isinstance(response, tuple):
+            if fetched_message is not None:
+                _add_fetched_message(raw_messages, *fetched_message)
+            fetched_message = (response[0], response[1])  # noqa pylint(unsubscriptable-object)
+        elif fetched_message is not None and isinstance(response, bytes):
+            # the data items after the message are part of its envelope
+            _add_fetched_message(raw_messages, fetched_message[0] + response, fetched_message[1])
+            fetched_message = None
+    if fetched_message is not None:
+        _add_fetched_message(raw_messages, *fetched_message)
+    return raw_messages
+
+
+def _add_fetched_message(raw_messages: Dict[bytes, Tuple[bytes, bytes]], envelope: bytes, raw_message: bytes) -> None:
+    """
+    Add a fetched message to `raw_messages` keyed by the UID in its envelope.
+
+    Args:
+        raw_messages (Dict[bytes, Tuple[bytes, bytes]]): The fetched messages keyed by message.
+        envelope (bytes): The `FETCH` response envelope, including any data items after the message.
+        raw_message (bytes): The raw message data.
+    """
+    fetched_uid = _FETCH_UID_RE.search(envelope)
+    if fetched_uid is not None:
+        raw_messages[fetched_uid.group(1)] = (envelope, raw_message)
+
+
+def _message_size(envelope: bytes) -> int:
+    """
+    Get the `RFC822.SIZE` of a message from its `FETCH` envelope.
+
+    Args:
+        envelope (bytes): The `FETCH` response envelope.
+
+    Returns:
+        int: The size of the message in bytes, or 0 if the server did not return the size.
+    """
+    message_size = _FETCH_SIZE_RE.search(envelope)
+    return int(message_size.group(1)) if message_size is not None else 0
+
+
+def _message_set(uids: List[bytes]) -> str:
+    """
+    Join messages into an IMAP message set.
+
+    UIDs are always ASCII digits so they are decoded once with the faster `ascii` codec.
+
+    Args:
+        uids (List[bytes]): The messages.
+
+    Returns:
+        str: The message set, e.g `1,2,3`.
+    """
+    return b",".join(uids).decode("ascii")
+
+
+def parse_email(raw_message: bytes, email_filter: EmailFilter | None = None, headers_only: bool = False) -> Email:
+    """
+    Create an `Email` object from a raw downloaded message.
+
+    The headers are parsed first to get the `subject`, `sender` and `date`. The full MIME tree is only parsed if the
+    message can have a `body` or `attachments`.
+
+    Args:
+        raw_message (bytes): The RFC822 message, or just its headers if `headers_only` is True.
+        email_filter (EmailFilter | None, optional): The user email filter. Defaults to None.
+        headers_only (bool, optional): Whether to only parse the headers. Defaults to False.
+
+    Returns:
+        Email: The parsed `Email`.
+    """
+    email_object = Email()
+    headers = _HEADER_PARSER.parsebytes(raw_message)
+    (
+        email_object.subject,
+        email_object.sender,
+        email_object.date,
+    ) = get_subject_and_sender(headers)
+
+    if headers_only:
+        email_object.headers_only = True
+        return email_object
+
+    # a single part message that isn't text has nothing to keep
+    if headers.get_content_maintype() != "multipart" and headers.get_content_type() not in ["text/plain", "text/html"]:
+        return email_object
+
+    msg = _MESSAGE_PARSER.parsebytes(raw_message)
+    if msg.is_multipart():
+        get_multipart_email(msg=msg, email_object=email_object, email_filter=email_filter)
+    else:
+        get_non_multipart_email(msg=msg, email_object=email_object)
+
+    return email_object
+
+
 def create_search_filter(email_filter: EmailFilter) -> str:
     """
-    Create a search filter using the `subject` and `sender`.
+    Create a search filter using the `subject`, `sender`, `since` and `before`.
 
-    If neither the `subject` nor `sender` are defined will return a filter for all messages.
+    If none of the `subject`, `sender`, `since` or `before` are defined will return a filter for all messages.
 
     Args:
         email_filter (EmailFilter): The `EmailFilter` instance.
@@ -134,79 +486,198 @@ def create_search_filter(email_filter: EmailFilter) -> str:
     Returns:
         str: An IMAP filter as a string.
     """
-    _search_filter = ""
-    if email_filter.subject:
-        _search_filter += f'HEADER Subject "{email_filter.subject}" '
-    if email_filter.sender:
-        _search_filter += f'(HEADER FROM "{email_filter.sender}") '
-    if not email_filter.subject and not email_filter.sender:
-        _search_filter += "ALL"
-    return _search_filter
+    _search_filter = []
+    key = (bool(email_filter.subject) << 1) | bool(email_filter.sender)
+    if key:
+        _search_filter.append(_SEARCH_FILTERS[key].format(subject=email_filter.subject, sender=email_filter.sender))
+
+    # let the server prune by date before any messages are returned
+    if email_filter.since is not None:
+        _search_filter.append(f"SINCE {_imap_date(email_filter.since)}")
+    if email_filter.before is not None:
+        _search_filter.append(f"BEFORE {_imap_date(email_filter.before)}")
 
+    return " ".join(_search_filter) if _search_filter else "ALL"
 
-def get_non_multipart_email(msg: Message, email_object: Email) -> Email:
+
+def _message_range(message_count: bytes | None, email_filter: EmailFilter) -> str | None:
     """
-    Get the `content_type` and `body` of a `Message` and attach to the `email_instance`.
+    Get the range of sequence numbers of the messages to download, e.g `81:100` for the 20 newest of 100 messages.
+
+    Searching the range instead of `ALL` means the server only returns the UIDs of the messages to download.
 
     Args:
-        msg (Message): The `Message` object for an email.
-        email_object (Email): The `Email` instance.
+        message_count (bytes | None): The number of messages in the mailbox from `imap.select`.
+        email_filter (EmailFilter): The user email filter.
+
+    Returns:
+        str | None: The sequence set, or None if every message is to be downloaded or the mailbox is empty.
+    """
+    messages_to_download = email_filter.messages_to_download
+    if messages_to_download <= 0 or message_count is None or not message_count.isdigit():
+        return None
+    total = int(message_count)
+    if total == 0:
+        return None
+    if email_filter.oldest_first:
+        return f"1:{min(messages_to_download, total)}"
+    return f"{max(total - messages_to_download + 1, 1)}:{total}"
+
+
+def _imap_date(date: datetime.date) -> str:
+    """
+    Format a date for an IMAP search, e.g `01-Jan-2024`.
+
+    The month is taken from a fixed table as `strftime("%b")` depends on the locale.
+
+    Args:
+        date (datetime.date): The date.
 
     Returns:
-        Email: The `email_object` with the `content_type` and `body`.
+        str: The date in the IMAP `date` format.
+    """
+    return f"{date.day:02d}-{_IMAP_MONTHS[date.month - 1]}-{date.year}"
+
+
+def get_non_multipart_email(msg: Message, email_object: Email) -> None:
+    """
+    Get the `content_type` and `body` of a `Message` and set them on the `email_object` in place.
+
+    Args:
+        msg (Message): The `Message` object for an email.
+        email_object (Email): The `Email` instance.
     """
     content_type = msg.get_content_type()
     if content_type in ["text/plain", "text/html"]:
-        email_object.content_type = content_type
-        email_object.body = msg.get_payload(decode=True).decode()
-    return email_object
+        email_part = _decode_payload(msg)
+        if email_part is not None:
+            email_object.content_type = content_type
+            email_object.body = email_part
 
 
-def get_multipart_email(msg: Message, email_object: Email) -> Email:
+def get_multipart_email(msg: Message, email_object: Email, email_filter: EmailFilter | None = None) -> None:
     """
     Get each part of a multipart `Message` and attach to the `email_object`.
 
     This function will walk over each of a `Message` and get the `content_type`, `body` and `attachments` and set
-    the attribute on the `email_object`.
+    the attribute on the `email_object` in place. The `body` is taken from the first text part of
+    `EmailFilter.prefer_content_type` that decodes. Other text parts are only decoded if there isn't one, and non text
+    parts are not decoded.
 
     Args:
         msg (Message): The `Message` object for an email.
         email_object (Email): The `Email` instance.
-
-    Returns:
-        Email: The `email_object` with the `content_type`, `body` and `attachments`.
+        email_filter (EmailFilter | None, optional): The user email filter. Defaults to None.
     """
+    spool_threshold = email_filter.attachment_spool_threshold if email_filter is not None else -1
+    prefer_content_type = email_filter.prefer_content_type if email_filter is not None else "text/plain"
+
+    # parts without a charset fall back to the charset of the message
+    default_charset = msg.get_content_charset() or "utf-8"
+    other_parts: List[Message] = []
     for part in msg.walk():
+        if "attachment" in str(part.get("Content-Disposition", "")):
+            get_attachment(part=part, email_object=email_object, spool_threshold=spool_threshold)
+            continue
+
+        # only decode text parts, and only until a body has been found
         content_type = part.get_content_type()
-        content_disposition = str(part.get("Content-Disposition"))
-        email_part = None
-        with contextlib.suppress(AttributeError, UnicodeDecodeError):
-            email_part = part.get_payload(decode=True).decode()
-        if (
-            content_type in ["text/plain", "text/html"]
-            and "attachment" not in content_disposition
-            and email_part is not None
-        ):
+        if content_type not in ["text/plain", "text/html"] or email_object.body:
+            continue
+        if content_type != prefer_content_type:
+            other_parts.append(part)
+            continue
+        email_part = _decode_payload(part, default_charset)
+        if email_part is not None:
             email_object.content_type = content_type
             email_object.body = email_part
-        elif "attachment" in content_disposition:
-            email_object = get_attachment(part=part, email_object=email_object)
-    return email_object
+
+    # fall back to the other text parts if there isn't a body of the preferred content type
+    for part in other_parts:
+        if email_object.body:
+            break
+        email_part = _decode_payload(part, default_charset)
+        if email_part is not None:
+            email_object.content_type = part.get_content_type()
+            email_object.body = email_part
 
 
-def get_attachment(part: Message, email_object: Email) -> Email:
+def _decode_payload(part: Message, default_charset: str = "utf-8") -> str | None:
     """
-    Get the attachment as bytes from an email part and append to `email_object.attachments`.
+    Decode the payload of a text part using its charset.
+
+    Undecodable bytes are replaced rather than dropping the whole body.
+
+    Args:
+        part (Message): The text part of an email.
+        default_charset (str, optional): The charset to use if the part doesn't declare one. Defaults to "utf-8".
+
+    Returns:
+        str | None: The decoded payload, or None if the part has no payload or an unknown charset.
+    """
+    payload = part.get_payload(decode=True)
+    if payload is None:
+        return None
+    try:
+        return payload.decode(part.get_content_charset() or default_charset, errors="replace")
+    except LookupError:
+        return None
+
+
+def get_attachment(part: Message, email_object: Email, spool_threshold: int = -1) -> None:
+    """
+    Get the attachment from an email part and append to `email_object.attachments` in place.
+
+    The payload is not decoded here - it is decoded when `Attachment.contents` is accessed. If the encoded payload is
+    larger than `spool_threshold` it is instead decoded to a temporary file so the email part can be released.
 
     Args:
         part (Message): The part of a multipart email.
         email_object (Email): The `Email` instance.
+        spool_threshold (int, optional): The encoded size in bytes above which the attachment is decoded to a
+            temporary file. If -1 the attachment is never spooled to disk. Defaults to -1.
+    """
+    payload = part.get_payload()
+    if spool_threshold < 0 or not isinstance(payload, str) or len(payload) <= spool_threshold:
+        email_object.attachments.append(Attachment(filename=part.get_filename(), part=part))
+        return
+
+    is_base64 = str(part.get("Content-Transfer-Encoding", "")).strip().lower() == "base64"
+    spool_file = tempfile.NamedTemporaryFile(prefix="easy-email-downloader-", delete=False)
+    spooled = False
+    try:
+        with spool_file:
+            if not (is_base64 and _spool_base64(payload, spool_file)):
+                spool_file.write(part.get_payload(decode=True) or b"")
+            size = spool_file.tell()
+        email_object.attachments.append(Attachment(filename=part.get_filename(), path=spool_file.name, size=size))
+        spooled = True
+    finally:
+        # don't leave a partly written file behind
+        if not spooled:
+            os.unlink(spool_file.name)
+
+
+def _spool_base64(payload: str, spool_file: IO[bytes]) -> bool:
+    """
+    Decode a base64 payload line by line into a file so the decoded payload is never held in memory.
+
+    Args:
+        payload (str): The base64 encoded payload.
+        spool_file (IO[bytes]): The file to write the decoded payload to.
 
     Returns:
-        Email: The `email_object` with the attachment appended to `email_object.attachments` as bytes.
+        bool: True if the payload was decoded, False if it was malformed. The file is left empty if False.
     """
-    email_object.attachments.append(Attachment(filename=part.get_filename(), contents=part.get_payload(decode=True)))
-    return email_object
+    try:
+        for line in io.StringIO(payload):
+            spool_file.write(binascii.a2b_base64(line))
+    except ValueError:
+        # binascii.Error for bad padding, or a plain ValueError for a non ASCII character
+        spool_file.seek(0)
+        spool_file.truncate()
+        return False
+    return True
 
 
 def get_subject_and_sender(msg: Message) -> Tuple[str, str, str]:
@@ -217,34 +688,84 @@ def get_subject_and_sender(msg: Message) -> Tuple[str, str, str]:
         msg (Message): The message object.
 
     Returns:
-        Tuple[str, str, str]: Return the subject, sender, date as strings.
+        Tuple[str, str, str]: Return the subject, sender, date as strings. A missing header is an empty string.
     """
-    # get subject
-    subject = sender = date = None
-    _subject, _subject_encoding = decode_header(msg["Subject"])[0]
-    if isinstance(_subject_encoding, bytes):
-        subject = _subject.decode(_subject_encoding)
-    else:
-        subject = str(_subject)
+    # find all three headers in a single pass over the message headers
+    headers: Dict[str, Any] = {"subject": None, "from": None, "date": None}
+    headers_found = 0
+    for key, value in msg.items():
+        key = key.lower()
+        if key in headers and headers[key] is None:
+            headers[key] = value
+            headers_found += 1
+            if headers_found == len(headers):
+                break
+
+    subject, sender, date = (_decode_header_value(header) for header in headers.values())
+    return (subject, sender, date)
 
-    # get sender
-    _sender, _sender_encoding = decode_header(msg.get("From"))[0]
-    if isinstance(_sender_encoding, bytes):
-        sender = _sender.decode(_sender_encoding)
-    else:
-        sender = str(_sender)
 
-    # get date
-    _date, _date_encoding = decode_header(msg.get("Date"))[0]
-    if isinstance(_date_encoding, bytes):
-        date = _date.decode(_date_encoding)
-    else:
-        date = str(_date)
+def _decode_header_value(header: Any) -> str:
+    """
+    Decode a header value, using the cache for plain string headers.
 
-    return (subject, sender, date)
+    Args:
+        header (Any): The raw header. Either a `str`, an `email.header.Header` or None if the header is missing.
+
+    Returns:
+        str: The decoded header, or an empty string if the header is missing.
+    """
+    if header is None:
+        return ""
+    if isinstance(header, str):
+        return _decode_header_cached(header)
+    return _decode_header(header)
 
 
-def check_mailbox(messages: List[bytes | None]):
+@functools.lru_cache(maxsize=4096)
+def _decode_header_cached(header: str) -> str:
+    """
+    Decode a header, caching the result.
+
+    Senders and subjects repeat heavily across a mailbox so the same raw header is often decoded many times. Headers
+    are immutable strings so caching is safe. Use `_decode_header_cached.cache_clear()` to release the cache.
+
+    Args:
+        header (str): The raw header.
+
+    Returns:
+        str: The decoded header.
+    """
+    return _decode_header(header)
+
+
+def _decode_header(header: Any) -> str:
+    """
+    Decode a header.
+
+    Every chunk of the header is decoded with its own charset, so headers mixing plain and encoded words (e.g
+    `Re: =?utf-8?q?...?=`) decode in full. `decode_header` returns the plain chunks of such a header encoded with
+    `raw-unicode-escape`, so they are decoded with it. Chunks with an unknown charset fall back to UTF-8.
+
+    Args:
+        header (Any): The raw header.
+
+    Returns:
+        str: The decoded header.
+    """
+    decoded_header = []
+    for _header, _header_encoding in decode_header(header):
+        if isinstance(_header, str):
+            decoded_header.append(_header)
+            continue
+        try:
+            decoded_header.append(_header.decode(_header_encoding or "raw-unicode-escape", errors="replace"))
+        except LookupError:
+            decoded_header.append(_header.decode("utf-8", errors="replace"))
+    return "".join(decoded_header)
+
+
+def check_mailbox(messages: List[bytes | None]) -> None:
     """
     Check if user provided mailbox exists.
 
@@ -255,8 +776,10 @@ def check_mailbox(messages: List[bytes | None]):
     Raises:
         NonExistentMailboxError: Raised if the selected mailbox does not exist.
     """
-    if messages[0] is not None:
-        _mailbox = messages[0].decode(encoding="utf-8")
-        non_existent_mailbox = re.search(r"(?P<message>Mailbox\sdoesn\'t\sexist)", _mailbox)
-        if isinstance(non_existent_mailbox, re.Match):
-            raise NonExistentMailboxError(non_existent_mailbox["message"])
+    _mailbox = messages[0]
+
+    # a mailbox that exists returns the number of messages in it
+    if _mailbox is None or _mailbox.isdigit():
+        return
+    if b"Mailbox doesn't exist" in _mailbox:
+        raise NonExistentMailboxError(_mailbox.decode(encoding="utf-8", errors="replace"))